@@ -0,0 +1,24 @@
+# weather_codes.py
+# WMO weather code descriptions used by Open-Meteo.
+# Lives in its own module so it is built once per process instead of on every
+# Streamlit rerun of the app script.
+
+from types import MappingProxyType
+
+WEATHERCODE_TEXT = MappingProxyType({
+    0: "Clear",
+    1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Fog", 48: "Depositing rime fog",
+    51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
+    56: "Freezing drizzle (light)", 57: "Freezing drizzle (dense)",
+    61: "Light rain", 63: "Moderate rain", 65: "Heavy rain",
+    66: "Freezing rain (light)", 67: "Freezing rain (heavy)",
+    71: "Light snow", 73: "Moderate snow", 75: "Heavy snow",
+    77: "Snow grains",
+    80: "Rain showers (slight)", 81: "Rain showers (moderate)", 82: "Rain showers (violent)",
+    85: "Snow showers (slight)", 86: "Snow showers (heavy)",
+    95: "Thunderstorm (slight/moderate)", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail",
+})
+
+# Dense lookup table (all codes are < 100), generated from WEATHERCODE_TEXT.
+WEATHERCODE_ARR = tuple(WEATHERCODE_TEXT.get(code, "N/A") for code in range(100))
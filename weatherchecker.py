@@ -1,87 +1,201 @@
 # app.py
 # Simple Weather Checker with dynamic background based on temperature
 
+import bisect
+import json
+import shelve
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
 import requests
-import pandas as pd
 import streamlit as st
+from requests.adapters import HTTPAdapter
+
+from weather_codes import WEATHERCODE_ARR
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; stdlib json also accepts bytes
+    _json_loads = json.loads
 
 st.set_page_config(page_title="WeatherCheckerPro — Simple Weather", page_icon="⛅")
 
 st.title("⛅ WeatherCheckerPro — Simple City Weather")
 st.caption("Type a city name and get current weather + 24-hour forecast. Background changes with temperature!")
 
-# --- Weather code descriptions ------------------------------------------------
-WEATHERCODE_TEXT = {
-    0: "Clear",
-    1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-    45: "Fog", 48: "Depositing rime fog",
-    51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
-    56: "Freezing drizzle (light)", 57: "Freezing drizzle (dense)",
-    61: "Light rain", 63: "Moderate rain", 65: "Heavy rain",
-    66: "Freezing rain (light)", 67: "Freezing rain (heavy)",
-    71: "Light snow", 73: "Moderate snow", 75: "Heavy snow",
-    77: "Snow grains",
-    80: "Rain showers (slight)", 81: "Rain showers (moderate)", 82: "Rain showers (violent)",
-    85: "Snow showers (slight)", 86: "Snow showers (heavy)",
-    95: "Thunderstorm (slight/moderate)", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail",
+# --- Background colors by temperature -----------------------------------------
+# COLORS[i] applies below TEMP_THRESHOLDS[i]; the last color covers the rest.
+TEMP_THRESHOLDS = (10, 25)
+COLORS = (
+    "#b3daff",  # Cold = light blue
+    "#d4f1c5",  # Mild = light green
+    "#ffb3b3",  # Hot = light red
+)
+DEFAULT_COLOR = "#ffffff"
+CSS_BY_COLOR = {
+    c: f"<style>.stApp {{ background-color: {c}; transition: background-color 0.8s ease; }}</style>"
+    for c in (*COLORS, DEFAULT_COLOR)
 }
 
 GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
 FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
 
-@st.cache_data(show_spinner=False, ttl=600)
+# Live objects shared across reruns must use st.cache_resource, which returns
+# the same instance every time; st.cache_data would hand back copies and the
+# connection pool would never be reused.
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Pooled keep-alive session shared by all reruns and users."""
+    s = requests.Session()
+    s.headers.update({"Accept": "application/json", "User-Agent": "WeatherCheckerPro"})
+    s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return s
+
+# Geocoded coordinates barely change, so keep them on disk across restarts.
+GEO_CACHE_PATH = ".geo_cache"
+GEO_CACHE_TTL = 30 * 86400
+
+@st.cache_resource
+def _geo_cache_lock() -> threading.Lock:
+    """Process-wide lock guarding the shelve file."""
+    return threading.Lock()
+
+def _geo_cache_get(key: str):
+    """Return a cached place for key, or None if missing/expired."""
+    try:
+        with _geo_cache_lock(), shelve.open(GEO_CACHE_PATH) as db:
+            entry = db.get(key)
+    except Exception:  # best-effort cache: unreadable/corrupt shelf is a miss
+        return None
+    if entry is None or entry[0] < time.time():
+        return None
+    return entry[1]
+
+def _geo_cache_set(key: str, place: dict):
+    """Store a place for key with a GEO_CACHE_TTL expiry."""
+    try:
+        with _geo_cache_lock(), shelve.open(GEO_CACHE_PATH) as db:
+            db[key] = (time.time() + GEO_CACHE_TTL, place)
+    except Exception:  # best-effort cache: unreadable/corrupt shelf is a miss
+        pass
+
 def geocode_city(name: str):
-    """Find city coordinates (lat/lon)."""
+    """Find city coordinates (lat/lon), ignoring case, spacing and trailing punctuation."""
+    name_norm = " ".join(name.lower().rstrip(".,;:!?").split())
+    if not name_norm:
+        return None
+    return _geocode_city_cached(name_norm)
+
+@st.cache_data(show_spinner=False, ttl=600)
+def _geocode_city_cached(name: str):
+    """Look up an already-normalized city name."""
+    hit = _geo_cache_get(name)
+    if hit is not None:
+        return hit
     try:
-        r = requests.get(GEOCODE_URL, params={"name": name, "count": 1, "language": "en"}, timeout=10)
+        r = get_session().get(GEOCODE_URL, params={"name": name, "count": 1, "language": "en"}, timeout=10)
         r.raise_for_status()
-        data = r.json()
+        data = _json_loads(r.content)
         if not data.get("results"):
             return None
         item = data["results"][0]
-        return {
+        place = {
             "name": item.get("name"),
             "country": item.get("country"),
             "admin1": item.get("admin1"),
             "lat": item.get("latitude"),
             "lon": item.get("longitude"),
         }
-    except requests.RequestException:
+        _geo_cache_set(name, place)
+        return place
+    except (requests.RequestException, ValueError):
+        return None
+
+def fetch_weather_many(places: list):
+    """Get current weather + hourly data for several places in one request.
+
+    Each place is a dict with "lat" and "lon" keys (e.g. from geocode_city).
+    Returns one forecast per place, in order, or None on failure.
+    """
+    if not places:
+        return []
+    if any(p.get("lat") is None or p.get("lon") is None for p in places):
         return None
+    # Round to ~1 km so near-identical centroids share a cache entry.
+    coords = tuple((round(p["lat"], 2), round(p["lon"], 2)) for p in places)
+    return _fetch_weather_cached(coords)
+
+FORECAST_ETAG_MAX = 256
+
+@st.cache_resource
+def _forecast_etags():
+    """LRU of the last (ETag, forecasts) per coords tuple, plus its lock."""
+    return OrderedDict(), threading.Lock()
 
 @st.cache_data(show_spinner=False, ttl=300)
-def fetch_weather(lat: float, lon: float):
-    """Get current weather + hourly data."""
+def _fetch_weather_cached(coords: tuple):
+    """Fetch forecasts for already-rounded (lat, lon) pairs."""
     params = {
-        "latitude": lat,
-        "longitude": lon,
+        "latitude": ",".join(str(lat) for lat, _ in coords),
+        "longitude": ",".join(str(lon) for _, lon in coords),
         "current_weather": "true",
-        "hourly": "temperature_2m,precipitation_probability,weathercode",
+        "hourly": "temperature_2m,precipitation_probability",
+        "forecast_days": 2,  # only the next 24 hours are shown
         "timezone": "auto",
     }
+    etags, etags_lock = _forecast_etags()
+    with etags_lock:
+        prev = etags.get(coords)
+    headers = {"If-None-Match": prev[0]} if prev else None
     try:
-        r = requests.get(FORECAST_URL, params=params, timeout=10)
+        r = get_session().get(FORECAST_URL, params=params, headers=headers, timeout=10)
+        if r.status_code == 304 and prev:
+            with etags_lock:
+                if coords in etags:
+                    etags.move_to_end(coords)
+            return prev[1]
         r.raise_for_status()
-        return r.json()
-    except requests.RequestException:
+        data = _json_loads(r.content)
+    except (requests.RequestException, ValueError):
         return None
+    # Open-Meteo returns a bare object for a single location, a list otherwise.
+    forecasts = data if isinstance(data, list) else [data]
+    etag = r.headers.get("ETag")
+    with etags_lock:
+        if etag:
+            etags[coords] = (etag, forecasts)
+            etags.move_to_end(coords)
+            while len(etags) > FORECAST_ETAG_MAX:
+                etags.popitem(last=False)
+        else:
+            etags.pop(coords, None)
+    return forecasts
+
+def fetch_weather(lat: float, lon: float):
+    """Get current weather + hourly data."""
+    results = fetch_weather_many([{"lat": lat, "lon": lon}])
+    return results[0] if results else None
 
 # --- Choose city form ----------------------------------------------------------
 with st.form("city_form"):
     city_input = st.text_input("City name", value="Sydney", help="Try Melbourne, Brisbane, London, Tokyo, etc.")
     submitted = st.form_submit_button("Get weather")
 
-if submitted:
-    if not city_input.strip():
+def _handle(city: str):
+    """Geocode the city and render its weather; returns early on errors."""
+    if not city.strip():
         st.warning("Please type a city name.")
-        st.stop()
+        return
 
     with st.spinner("Finding your city…"):
-        place = geocode_city(city_input.strip())
+        place = geocode_city(city.strip())
 
     if not place:
         st.error("Sorry, I couldn't find that city. Try again.")
-        st.stop()
+        return
 
     st.success(f"Found: **{place['name']}**, {place.get('admin1') or ''} {place['country']}")
 
@@ -90,7 +204,7 @@ if submitted:
 
     if not data:
         st.error("Could not fetch weather data. Try again.")
-        st.stop()
+        return
 
     # --- Current weather -------------------------------------------------------
     cw = data.get("current_weather") or {}
@@ -98,31 +212,13 @@ if submitted:
     windspeed = cw.get("windspeed")
     winddir = cw.get("winddirection")
     code = cw.get("weathercode")
-    desc = WEATHERCODE_TEXT.get(code, "N/A")
+    desc = WEATHERCODE_ARR[code] if isinstance(code, int) and 0 <= code < 100 else "N/A"
 
     # ✅ Dynamic background color
-    if temp_now is not None:
-        if temp_now < 10:
-            bg_color = "#b3daff"   # Cold = light blue
-        elif temp_now < 25:
-            bg_color = "#d4f1c5"   # Mild = light green
-        else:
-            bg_color = "#ffb3b3"   # Hot = light red
-    else:
-        bg_color = "#ffffff"       # Default white
+    bg_color = DEFAULT_COLOR if temp_now is None else COLORS[bisect.bisect_right(TEMP_THRESHOLDS, temp_now)]
 
     # Inject CSS dynamically
-    st.markdown(
-        f"""
-        <style>
-        .stApp {{
-            background-color: {bg_color};
-            transition: background-color 0.8s ease;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(CSS_BY_COLOR[bg_color], unsafe_allow_html=True)
 
     st.subheader("Current weather")
     c1, c2, c3, c4 = st.columns(4)
@@ -138,22 +234,24 @@ if submitted:
     temps = hourly.get("temperature_2m", [])
     pops = hourly.get("precipitation_probability")
 
-    df = pd.DataFrame({"time": pd.to_datetime(times), "temperature_2m": temps})
-    if pops is not None:
-        df["precipitation_probability"] = pops
-    df_24 = df.head(24).copy()
-
-    st.line_chart(df_24.set_index("time")["temperature_2m"], height=220)
-
-    nice_table = df_24.copy()
-    nice_table["time"] = nice_table["time"].dt.strftime("%Y-%m-%d %H:%M")
-    if "precipitation_probability" not in nice_table.columns:
-        nice_table["precipitation_probability"] = None
-    nice_table.rename(columns={
-        "time": "Local time",
-        "temperature_2m": "Temp (°C)",
-        "precipitation_probability": "Rain chance (%)"
-    }, inplace=True)
-    st.dataframe(nice_table, use_container_width=True)
-
-    st.caption("Data source: Open-Meteo (free). Background changes with temperature 🌡️")
\ No newline at end of file
+    times24 = times[:24]
+    temps24 = temps[:24]
+    pops24 = pops[:24] if pops is not None else [None] * len(times24)
+
+    chart_data = {
+        "time": [datetime.fromisoformat(t) for t in times24],
+        "Temp (°C)": temps24,
+    }
+    st.line_chart(chart_data, x="time", y="Temp (°C)", height=220)
+
+    table_data = {
+        "Local time": [t.replace("T", " ") for t in times24],
+        "Temp (°C)": temps24,
+        "Rain chance (%)": pops24,
+    }
+    st.dataframe(table_data, use_container_width=True)
+
+    st.caption("Data source: Open-Meteo (free). Background changes with temperature 🌡️")
+
+if submitted:
+    _handle(city_input)